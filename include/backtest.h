@@ -224,6 +224,27 @@ private:
     SignalPriorityMode parseSignalPriorityMode(const std::string& mode);
 };
 
+// 账户详细信息 (每个价格数据点一条)
+struct AccountDetail {
+    DateTime date;             // 日期
+    double price;              // 价格
+    double balance;            // 可用余额
+    double position_value;     // 持仓价值
+    double total_value;        // 账户总价值
+    double profit_loss;        // 盈亏金额
+    double cumulative_return;  // 累计收益率（百分比）
+    double drawdown;           // 回撤（百分比）
+    int active_trades;         // 活跃交易数量
+};
+
+// 计算完整的账户详细信息 (基于原始价格数据)，输入无效时返回空序列
+std::vector<AccountDetail> compute_account_details(
+    const std::vector<Trade>& trades,
+    const std::vector<double>& prices,
+    const std::vector<DateTime>& dates,
+    double initial_capital = 10000.0
+);
+
 // 创建完整的账户详细信息并保存为CSV (基于原始价格数据)
 void create_account_details_with_prices(
     const std::vector<Trade>& trades,
@@ -233,4 +254,12 @@ void create_account_details_with_prices(
     const std::string& output_file = "account_details.csv"
 );
 
+// 将已计算的账户详细信息保存为CSV (含摘要统计)
+void write_account_details_csv(
+    const std::vector<AccountDetail>& account_details,
+    size_t total_trades,
+    double initial_capital,
+    const std::string& output_file
+);
+
 #endif // BACKTEST_H 
\ No newline at end of file
@@ -0,0 +1,21 @@
+"""
+AOT编译_signals_njit中的信号内核，生成_signals_aot扩展模块
+
+由setup.py的build_ext在编译C++模块后调用，也可直接运行:
+    python python/_signals_aot_build.py
+"""
+import os
+
+from numba.pycc import CC
+
+from _signals_njit import _gen_signals, _sma
+
+cc = CC('_signals_aot')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# 复用与JIT版本相同的Python源函数，保证AOT与JIT版本逻辑一致
+cc.export('gen_signals', 'void(i1[:], i1[:], i4, i4, i1[:], i1[:])')(_gen_signals)
+cc.export('sma', 'f8[:](f8[:], i4)')(_sma)
+
+if __name__ == '__main__':
+    cc.compile()
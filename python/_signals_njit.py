@@ -0,0 +1,114 @@
+import numpy as np
+
+# 交易类型/信号类型到整数代码的映射 (供内核分派使用)
+TRADE_TYPE_CODES = {'long': 0, 'short': 1, 'long_short': 2}
+SIGNAL_TYPE_CODES = {'trend': 0, 'cross': 1}
+
+
+def _gen_signals(es, xs, trade_code, signal_code, out_entry, out_exit):
+    """
+    单次遍历生成入场/出场信号，结果写入预分配的out_entry/out_exit
+
+    参数:
+    es, xs: 入场/出场状态数组 (0/1)
+    trade_code: 0=long, 1=short, 2=long_short
+    signal_code: 0=trend, 1=cross
+    out_entry, out_exit: 输出数组 (int8)
+    """
+    n = es.shape[0]
+    for i in range(n):
+        if signal_code == 1:
+            # 交叉信号：从 0->1 的那一刻 (首个bar无交叉)
+            if i == 0:
+                se = 0
+                sx = 0
+            else:
+                se = 1 if (es[i] == 1 and es[i - 1] == 0) else 0
+                sx = 1 if (xs[i] == 1 and xs[i - 1] == 0) else 0
+        else:
+            se = 1 if es[i] == 1 else 0
+            sx = 1 if xs[i] == 1 else 0
+
+        if trade_code == 0:
+            # 做多模式: 入场信号+1, 出场信号-1
+            out_entry[i] = se
+            out_exit[i] = -sx
+        elif trade_code == 1:
+            # 做空模式: 入场信号-1, 出场信号+1
+            out_entry[i] = -se
+            out_exit[i] = sx
+        else:
+            # 长短模式: 进入多头+1/进入空头-1, 出场信号同向 (入场/出场状态须互斥，同时为1时为0)
+            out_entry[i] = se - sx
+            out_exit[i] = se - sx
+
+
+def _sma(c, w):
+    """
+    简单移动平均 (滚动求和，单次遍历)，前w-1个值为NaN
+    """
+    n = c.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    s = 0.0
+    for i in range(n):
+        s += c[i]
+        if i >= w:
+            s -= c[i - w]
+        out[i] = s / w if i >= w - 1 else np.nan
+    return out
+
+
+# 优先使用AOT编译的内核 (由_signals_aot_build.py生成)，避免首次调用时的JIT编译开销；
+# AOT模块只依赖numpy，运行时无需numba。numba仅在AOT模块不可用时才导入 (导入本身约需0.2秒)
+try:
+    from _signals_aot import gen_signals as _gen_signals_kernel, sma as _sma_kernel
+    HAS_AOT = True
+    HAS_NUMBA = False
+except ImportError:
+    HAS_AOT = False
+    try:
+        from numba import njit
+        HAS_NUMBA = True
+        _gen_signals_kernel = njit(cache=True, boundscheck=False)(_gen_signals)
+        _sma_kernel = njit(cache=True, boundscheck=False)(_sma)
+    except ImportError:
+        # numba未安装时内核为纯Python循环
+        HAS_NUMBA = False
+        _gen_signals_kernel, _sma_kernel = _gen_signals, _sma
+
+# 是否有编译后的内核可用 (否则内核为纯Python循环，应使用NumPy实现)
+HAS_COMPILED_KERNELS = HAS_AOT or HAS_NUMBA
+
+
+def gen_signals(es, xs, trade_type, signal_type):
+    """
+    _gen_signals的Python包装：映射类型代码并分配输出数组
+
+    返回: (entry_signals, exit_signals)，均为int8数组
+    """
+    n = len(es)
+    entry = np.empty(n, dtype=np.int8)
+    exit_ = np.empty(n, dtype=np.int8)
+    _gen_signals_kernel(es, xs, TRADE_TYPE_CODES[trade_type], SIGNAL_TYPE_CODES[signal_type], entry, exit_)
+    return entry, exit_
+
+
+def sma(close, timeperiod):
+    """
+    计算简单移动平均 (替代talib.SMA)
+
+    参数:
+    close: 价格序列 (Series或数组)
+    timeperiod: 窗口长度
+
+    返回: float64数组，前timeperiod-1个值为NaN
+    """
+    c = np.asarray(close, dtype=np.float64)
+    if HAS_COMPILED_KERNELS:
+        return _sma_kernel(c, timeperiod)
+    # 无编译内核时使用累积和差分
+    out = np.full(len(c), np.nan)
+    if len(c) >= timeperiod:
+        cs = np.concatenate(([0.0], np.cumsum(c)))
+        out[timeperiod - 1:] = (cs[timeperiod:] - cs[:-timeperiod]) / timeperiod
+    return out
@@ -1,18 +1,14 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime
 import importlib.util
 import sys
 import os
+import pathlib
+import threading
 import uuid
-import csv
 
-# 获取当前脚本的绝对路径
-current_dir = os.path.dirname(os.path.abspath(__file__))
-# 获取项目根目录
-root_dir = os.path.dirname(current_dir)
-# 构建数据文件的完整路径
-data_path = os.path.join(root_dir, 'data', 'btc.csv')
+# 项目根目录 (模块加载时计算一次)
+ROOT = pathlib.Path(__file__).resolve().parent.parent
 
 # 尝试导入cpp_backtest模块
 try:
@@ -21,6 +17,54 @@ except ImportError:
     print("C++ backtest module not found. Please run 'pip install -e .' from the project root first.")
     sys.exit(1)
 
+# 线程本地的信号缓冲区: 参数扫描中以相同长度反复调用create_backtest时复用，避免每次分配
+_SCRATCH = threading.local()
+
+def _scratch_buffer(slot, n):
+    """返回当前线程slot ('entry'/'exit') 对应的长度为n的int8缓冲区 (首次使用或长度变化时才分配)"""
+    buffer = getattr(_SCRATCH, slot, None)
+    if buffer is None or buffer.shape[0] != n:
+        buffer = np.empty(n, dtype=np.int8)
+        setattr(_SCRATCH, slot, buffer)
+    return buffer
+
+def _ndarray_to_int8(arr, slot):
+    """
+    将numpy信号数组 (布尔值或-1/0/1) 转换为C连续的int8数组
+    已是连续的int8/布尔数组时零复制返回 (布尔数组通过view)，否则写入slot对应的缓冲区
+    """
+    if arr.flags.c_contiguous:
+        if arr.dtype == np.int8:
+            return arr
+        if arr.dtype == bool:
+            return arr.view(np.int8)
+    if arr.ndim != 1:
+        return np.ascontiguousarray(arr, dtype=np.int8)
+    out = _scratch_buffer(slot, arr.shape[0])
+    np.copyto(out, arr, casting='unsafe')
+    return out
+
+def _series_to_int8(series, slot):
+    """将pandas Series信号转换为C连续的int8数组"""
+    return _ndarray_to_int8(series.to_numpy(), slot)
+
+def _sequence_to_int8(signals, slot):
+    """将其他序列类型 (如list) 的信号转换为C连续的int8数组"""
+    return _ndarray_to_int8(np.asarray(signals), slot)
+
+# 按信号类型分派的转换函数 (模块加载时确定，避免每次调用的类型判断)
+_SIGNAL_CONVERTERS = {
+    np.ndarray: _ndarray_to_int8,
+    pd.Series: _series_to_int8,
+}
+
+def _as_int8_signals(signals, slot):
+    """将信号转换为C连续的int8数组，需要转换时写入slot ('entry'/'exit') 对应的缓冲区"""
+    return _SIGNAL_CONVERTERS.get(type(signals), _sequence_to_int8)(signals, slot)
+
+# C++端的回测参数配置结构体 (参数扫描中构造一次，传给create_backtest(config=...)复用)；旧版本扩展模块中为None
+BacktestConfig = getattr(cpp_backtest, 'BacktestConfig', None)
+
 def create_backtest(
     entry,
     exit,
@@ -37,7 +81,9 @@ def create_backtest(
     slippage=0.0,
     price_type="close",
     max_positions=1,
-    force_close_on_signal=True
+    force_close_on_signal=True,
+    trades_format="dicts",
+    config=None
 ):
     """
     使用C++后端进行回测计算
@@ -59,6 +105,8 @@ def create_backtest(
     price_type (str): 使用的价格类型 (默认: "close")
     max_positions (int): 最大同时持仓数量 (默认: 1，即单笔持仓，0表示不限制)
     force_close_on_signal (bool): 强制在出现出场信号时平仓 (默认: True)
+    trades_format (str): 交易记录格式，"dicts"（字典列表）或"columnar"（按列的numpy数组，时间为int64纳秒时间戳） (默认: "dicts")
+    config (BacktestConfig): 预先构造的cpp_backtest.BacktestConfig，提供时忽略上面除price_type外的各个参数 (默认: None)
     
     返回:
     dict: 包含回测结果的字典
@@ -67,27 +115,25 @@ def create_backtest(
     if data.index.name is None:
         data.index.name = 'date'
     
-    # 转换入场信号
-    if hasattr(entry, 'dtype') and isinstance(entry, np.ndarray):
-        # 如果已经是numpy数组，直接使用
-        entry_signals = entry
-    elif hasattr(entry, 'dtype') and entry.dtype == bool:
-        # 如果是布尔值Series，转为1/0
-        entry_signals = np.where(entry, 1, 0)
-    else:
-        # 如果是pandas Series
-        entry_signals = entry.values
-    
-    # 转换出场信号
-    if hasattr(exit, 'dtype') and isinstance(exit, np.ndarray):
-        # 如果已经是numpy数组，直接使用
-        exit_signals = exit
-    elif hasattr(exit, 'dtype') and exit.dtype == bool:
-        # 如果是布尔值Series，转为1/0
-        exit_signals = np.where(exit, 1, 0)
+    # 日期统一为datetime64[ns]表示: 数值时间戳大于1e10视为毫秒，否则视为秒 (只判断一次，由pandas批量转换)
+    # 数值时间戳与带时区的索引表示真实时刻，以UTC纳秒传给C++ (与datetime.fromtimestamp/Timestamp.timestamp一致)；
+    # 无时区的索引视为本地时间
+    date_index = data.index
+    if not isinstance(date_index, pd.DatetimeIndex):
+        timestamps = np.asarray(date_index)
+        date_index = pd.to_datetime(timestamps, unit='ms' if timestamps[0] > 1e10 else 's')
+        dates_are_utc = True
     else:
-        # 如果是pandas Series
-        exit_signals = exit.values
+        dates_are_utc = date_index.tz is not None
+    if getattr(date_index, 'unit', 'ns') != 'ns':
+        # as_unit即使单位相同也会复制，仅在需要时转换 (pandas<2.0没有unit属性，索引总是纳秒精度)
+        date_index = date_index.as_unit('ns')
+    # asi8为底层int64缓冲区的零复制视图 (带时区时即为UTC纳秒)，可直接传给C++
+    dates_ns = date_index.asi8
+    
+    # 转换入场/出场信号为连续的int8数组 (类型与布局已匹配时不复制，否则写入线程本地缓冲区)
+    entry_signals = _as_int8_signals(entry, 'entry')
+    exit_signals = _as_int8_signals(exit, 'exit')
     
     # 根据price_type获取价格数据
     if price_type in data.columns:
@@ -96,24 +142,35 @@ def create_backtest(
         prices = data['close'].values
         print(f"警告: 未找到列 '{price_type}', 使用 'close' 列代替。")
     
-    # 处理日期数据
-    if isinstance(data.index[0], (int, float)):
-        dates = [datetime.fromtimestamp(ts/1000) if ts > 1e10 else datetime.fromtimestamp(ts) 
-                for ts in data.index]
-    else:
-        # 如果索引已经是datetime，直接使用
-        dates = data.index.to_pydatetime().tolist()
-    
     # 根据C++模块的要求调整交易类型参数
     cpp_trade_type = trade_type.lower()
     
+    # 优先以纳秒时间戳数组传入C++，避免逐个构造Python datetime对象；
+    # 旧版本扩展模块没有run_backtest_ns时，退化为datetime列表
+    if hasattr(cpp_backtest, 'run_backtest_ns'):
+        run_backtest = cpp_backtest.run_backtest_ns
+        extra_kwargs = {'dates_ns': dates_ns}
+        if dates_are_utc:
+            extra_kwargs['dates_are_utc'] = True
+    else:
+        run_backtest = cpp_backtest.run_backtest
+        extra_kwargs = {'dates': list(pd.DatetimeIndex(dates_ns, tz='UTC' if dates_are_utc else None).to_pydatetime())}
+    
+    # 仅在非默认格式时传入trades_format，保持与旧版本扩展模块兼容
+    if trades_format != "dicts":
+        extra_kwargs['trades_format'] = trades_format
+    
     # 调用C++回测函数
     try:
-        result = cpp_backtest.run_backtest(
+        if config is not None:
+            # 预先构造的配置结构体按位置传入，避免逐个关键字参数的分派开销
+            return cpp_backtest.run_backtest_cfg(prices, entry_signals, exit_signals, dates_ns, config, dates_are_utc)
+        
+        result = run_backtest(
             prices=prices,
             entries=entry_signals,
             exits=exit_signals,
-            dates=dates,
+            **extra_kwargs,
             timeframe=timeframe,
             trade_type=cpp_trade_type,
             initial_capital=initial_capital,
@@ -160,8 +217,34 @@ def create_account_details_full(
         print(f"生成完整账户详细信息出错: {str(e)}")
         return None
 
+def get_account_details(
+    total_trades,
+    initial_capital=10000.0,
+    output_file=None
+):
+    """
+    获取完整的账户详细信息 (按列返回)
+    
+    参数:
+    total_trades (int): 交易总数，用于验证是否有足够的交易数据
+    initial_capital (float): 初始资金 (默认: 10000.0)
+    output_file (str): 如指定，同时将同一份账户详情保存为CSV文件 (避免重复计算)
+    
+    返回:
+    dict: 列名到numpy数组的映射，每个价格数据点一行 (date列为int64纳秒时间戳)；或None（如果出错）
+    """
+    try:
+        return cpp_backtest.get_account_details(
+            total_trades=total_trades,
+            initial_capital=initial_capital,
+            output_file=output_file or ""
+        )
+    except Exception as e:
+        print(f"获取账户详细信息出错: {str(e)}")
+        return None
+
 # 创建一个函数，将所有数据聚合为一个DataFrame并保存为CSV
-def create_aggregated_record(df, entry, exit, results, account_details_file=None):
+def create_aggregated_record(df, entry, exit, results, account_details_file=None, account_details=None):
     """
     聚合所有数据，包括原始价格、指标、信号和账户信息，保存为CSV文件
     
@@ -171,32 +254,41 @@ def create_aggregated_record(df, entry, exit, results, account_details_file=None
     exit: 出场信号数组
     results: 回测结果字典
     account_details_file: 账户详情文件路径（如果有）
+    account_details: get_account_details返回的账户详情列（如果有，优先于文件使用）
     
     返回:
     生成的CSV文件路径
     """
-    # 创建副本以避免修改原始数据
-    record_df = df.copy()
-    
-    # 添加入场和出场信号
+    # 添加入场和出场信号: 浅复制与原始数据共享价格/指标列，只在新DataFrame上增加列，不修改原始数据
+    # (未启用Copy-on-Write的pandas中df.assign会深复制全部列)
+    record_df = df.copy(deep=False)
     record_df['entry_signal'] = entry
     record_df['exit_signal'] = exit
     
-    # 如果有账户详情文件，则加载并合并
-    if account_details_file and os.path.exists(account_details_file):
+    # 如果有内存中的账户详情，则按日期合并 (与读取文件时一致)
+    if account_details is not None:
         try:
-            # 读取账户详情文件（跳过最后的摘要统计行）
-            account_df = pd.read_csv(account_details_file)
-            
-            # 找到Summary Statistics的行索引
-            summary_start_idx = account_df[account_df.iloc[:,0] == 'Summary Statistics'].index
-            if len(summary_start_idx) > 0:
-                # 排除摘要统计部分
-                account_df = account_df.iloc[:summary_start_idx[0]]
-            
-            # 将Date列转换为datetime并设为索引
-            account_df['Date'] = pd.to_datetime(account_df['Date'])
-            account_df.set_index('Date', inplace=True)
+            # date列为int64纳秒时间戳，以datetime64视图作为索引 (不复制)
+            account_index = pd.DatetimeIndex(account_details['date'].view('datetime64[ns]'), name='Date')
+            account_df = pd.DataFrame(
+                {key: values for key, values in account_details.items() if key != 'date'},
+                index=account_index
+            )
+            account_df.rename(columns={'price': 'account_price', 'balance': 'account_balance'}, inplace=True)
+            record_df = record_df.join(account_df, how='left')
+        except Exception as e:
+            print(f"警告: 合并账户详情失败: {e}")
+    # 否则如果有账户详情文件，则加载并合并
+    elif account_details_file and os.path.exists(account_details_file):
+        try:
+            # 读取账户详情文件: 数据部分每个价格数据点一行，按行数截断即可跳过末尾的摘要统计，
+            # 同时在解析时将Date列转换为datetime并设为索引
+            account_df = pd.read_csv(
+                account_details_file,
+                nrows=len(record_df),
+                parse_dates=['Date'],
+                index_col='Date'
+            )
             
             # 重命名列以避免冲突
             account_columns = {
@@ -233,18 +325,15 @@ def create_aggregated_record(df, entry, exit, results, account_details_file=None
     # 生成随机文件名
     random_id = str(uuid.uuid4())[:8]
     record_filename = f"Record_{random_id}.csv"
-    record_filepath = os.path.join(root_dir, record_filename)
+    record_filepath = str(ROOT / record_filename)
     
     # 先将DataFrame保存到CSV文件
     record_df.to_csv(record_filepath)
     
-    # 添加元数据到CSV底部
+    # 添加元数据到CSV底部 (值均已格式化且不含逗号，一次性写入)
+    summary = "\n回测指标摘要\n" + "\n".join(f"{key},{value}" for key, value in metadata.items()) + "\n"
     with open(record_filepath, 'a', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow([])  # 空行
-        writer.writerow(["回测指标摘要"])
-        for key, value in metadata.items():
-            writer.writerow([key, value])
+        f.write(summary)
     
     print(f"聚合数据已保存到: {record_filepath}")
     return record_filepath
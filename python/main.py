@@ -1,13 +1,25 @@
 #!/usr/bin/env python3
-import os
+import pathlib
 import pandas as pd
 import numpy as np
-import talib as ta
 import sys
+
+# 项目根目录及数据文件路径 (模块加载时计算一次)
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+DATA_PATH = ROOT / 'data' / 'btc.csv'
+
 # 添加项目根目录到 Python 路径
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, str(ROOT))
 import cpp_backtest
-from backtest import create_backtest, create_account_details_full, create_aggregated_record
+from backtest import create_backtest, get_account_details, create_aggregated_record
+from _signals_njit import HAS_COMPILED_KERNELS, TRADE_TYPE_CODES, SIGNAL_TYPE_CODES, gen_signals, sma
+
+# pyarrow可用时使用其多线程CSV解析引擎，否则使用pandas默认的C引擎
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
 
 
 def generate_signals(
@@ -26,40 +38,51 @@ def generate_signals(
     - long模式: entry +1, exit -1
     - short模式: entry -1, exit +1
     - long_short模式: entry +1/-1 表示做多/做空, exit不使用
+    注意: long_short模式下entry_state与exit_state须互斥 (信号取两者之差，
+    同一bar两者均为1时入场/出场信号均为0，不产生信号)
     """
 
+    # 转为int8数组，避免pandas对齐与中间Series开销
+    es = np.asarray(entry_state, dtype=np.int8)
+    xs = np.asarray(exit_state, dtype=np.int8)
+    n = len(df)
+
+    # 有编译内核 (AOT或numba JIT) 时使用单次遍历的融合内核，否则使用NumPy向量化实现
+    if HAS_COMPILED_KERNELS and trade_type in TRADE_TYPE_CODES and signal_type in SIGNAL_TYPE_CODES:
+        return gen_signals(es, xs, trade_type, signal_type)
+
     # 交叉信号：从 False->True 的那一刻
-    cross_entry = ((entry_state == 1) & (entry_state.shift(1) == 0)).astype(int)
-    cross_exit  = ((exit_state  == 1) & (exit_state.shift(1)  == 0)).astype(int)
+    # 状态取值为0/1，cur == 1 and prev == 0 等价于 cur > prev，单次比较直接写入输出
+    cross_entry = np.empty(n, dtype=np.int8)
+    cross_exit = np.empty(n, dtype=np.int8)
+    cross_entry[:1] = 0
+    cross_exit[:1] = 0
+    np.greater(es[1:], es[:-1], out=cross_entry[1:])
+    np.greater(xs[1:], xs[:-1], out=cross_exit[1:])
 
     # 选择信号源
     if signal_type == 'cross':
         src_entry, src_exit = cross_entry, cross_exit
     elif signal_type == 'trend':
-        src_entry, src_exit = entry_state, exit_state
+        src_entry, src_exit = es, xs
     else:
         raise ValueError(f"Unsupported signal_type: {signal_type}")
 
-    # 初始化
-    n = len(df)
-    entry = np.zeros(n, dtype=int)
-    exit_ = np.zeros(n, dtype=int)
-
-    # 根据新的逻辑设置信号
+    # 根据新的逻辑设置信号 (信号源为0/1的int8数组，直接用算术代替掩码赋值，每个输出只分配一次)
+    # 信号源可能与输入共享内存，输出总是新数组
     if trade_type == 'long':
         # 做多模式: 入场信号+1, 出场信号-1
-        entry[src_entry.values == 1] = 1
-        exit_[src_exit.values == 1] = -1
+        entry = src_entry.copy()
+        exit_ = np.negative(src_exit)
     elif trade_type == 'short':
         # 做空模式: 入场信号-1, 出场信号+1
-        entry[src_entry.values == 1] = -1
-        exit_[src_exit.values == 1] = 1
+        entry = np.negative(src_entry)
+        exit_ = src_exit.copy()
     elif trade_type == 'long_short':
-        # 长短模式保持不变: 入场信号决定方向
-        entry[src_entry.values == 1] = 1   # 指标进入多头
-        exit_[src_exit.values == 1] = -1   # 指标死叉做空
-        entry[src_exit.values == 1] = -1   # 指标进入空头
-        exit_[src_entry.values == 1] = 1   # 指标金叉做多
+        # 长短模式: 入场信号决定方向 (指标进入多头+1, 进入空头-1)
+        # 出场信号同向: 死叉平多(-1), 金叉平空(+1)；入场/出场状态须互斥，同时为1时相互抵消为0
+        entry = src_entry - src_exit
+        exit_ = entry.copy()
     else:
         raise ValueError(f"Unsupported trade_type: {trade_type}")
 
@@ -67,13 +90,8 @@ def generate_signals(
 
 
 def main():
-    # 定位数据文件
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    root_dir = os.path.dirname(current_dir)
-    data_path = os.path.join(root_dir, 'data', 'btc.csv')
-
     # 加载CSV
-    df = pd.read_csv(data_path)
+    df = pd.read_csv(DATA_PATH, engine=CSV_ENGINE)
     if 'date' in df.columns:
         df['date'] = pd.to_datetime(df['date'], unit='ms')
         df.set_index('date', inplace=True)
@@ -84,7 +102,7 @@ def main():
         raise KeyError("CSV must contain 'date' or 'time' column")
 
     # 计算SMA
-    df['sma'] = ta.SMA(df['close'], timeperiod=10)
+    df['sma'] = sma(df['close'], timeperiod=10)
     df.dropna(subset=['sma'], inplace=True)
     entry_state = (df['close'] > df['sma']).astype(int)
     exit_state  = (df['close'] < df['sma']).astype(int)
@@ -122,7 +140,8 @@ def main():
         max_positions=10,
         timeframe='1d',
         trade_type=trade_type,
-        force_close_on_signal=True
+        force_close_on_signal=True,
+        trades_format='columnar'
     )
 
     # 输出回测指标
@@ -132,18 +151,24 @@ def main():
         print(f"{key}: {m[key]}")
 
     # 保存明细
-    account_file = create_account_details_full(m['total_trades'], initial_capital=10000.0)
+    # 账户详情只计算一次：按列返回，同时保存为CSV
+    account_file = "account_details_full.csv"
+    account_details = get_account_details(m['total_trades'], initial_capital=10000.0, output_file=account_file)
     print(f"账户详细信息保存至: {account_file}")
 
-    record_file = create_aggregated_record(df, entry, exit_, results, account_file)
+    record_file = create_aggregated_record(df, entry, exit_, results, account_file, account_details)
     print(f"聚合记录保存至: {record_file}")
 
-    # 打印前两笔交易
-    trades = results.get('trades', [])
-    if trades:
-        print(f"共 {len(trades)} 笔交易")
-        for i, t in enumerate(trades[:2], start=1):
-            print(f"# {i}: 入{t['entry_time']} 平{t['exit_time']} 利润{t['profit_pct']:.2f}% 原因{t['exit_reason']}")
+    # 打印前两笔交易 (交易记录按列返回，仅对需要展示的部分构造DataFrame)
+    trades = results['trades']
+    n_trades = len(trades['entry_time'])
+    if n_trades:
+        print(f"共 {n_trades} 笔交易")
+        head = pd.DataFrame({key: values[:2] for key, values in trades.items()})
+        head['entry_time'] = pd.to_datetime(head['entry_time'])
+        head['exit_time'] = pd.to_datetime(head['exit_time'])
+        for i, t in enumerate(head.itertuples(index=False), start=1):
+            print(f"# {i}: 入{t.entry_time} 平{t.exit_time} 利润{t.profit_pct:.2f}% 原因{t.exit_reason}")
 
 if __name__ == '__main__':
     main()
@@ -1,6 +1,8 @@
 from setuptools import setup, Extension
 from pybind11.setup_helpers import Pybind11Extension, build_ext
 import os
+import platform
+import sys
 
 # 获取源文件
 sources = [
@@ -9,17 +11,50 @@ sources = [
     "src/account_details.cpp"  # 添加账户详细信息文件
 ]
 
+# 编译优化选项 (开启O3、本机指令集与链接时优化)
+# 注意: 不使用-ffast-math，它隐含-ffinite-math-only，会使夏普/索提诺比率中的std::isnan判断失效
+if platform.system() == "Windows":
+    extra_compile_args = ["/std:c++17", "/O2", "/arch:AVX2", "/GL", "/DNDEBUG"]
+    extra_link_args = ["/LTCG"]
+else:
+    # Apple clang在arm64上不支持-march=native，使用-mcpu=native
+    native_flag = "-mcpu=native" if platform.machine() == "arm64" else "-march=native"
+    extra_compile_args = ["-std=c++17", "-O3", native_flag, "-fno-math-errno", "-DNDEBUG", "-flto"]
+    extra_link_args = ["-flto"]
+
 # 编译C++模块
 ext_modules = [
     Pybind11Extension(
         "cpp_backtest",
         sources=sources,
         include_dirs=["include"],
-        # 添加C++17标准支持
-        extra_compile_args=["-std=c++17"],
+        # C++17标准支持及优化选项
+        extra_compile_args=extra_compile_args,
+        extra_link_args=extra_link_args,
     ),
 ]
 
+class BuildExtWithAOT(build_ext):
+    """编译C++模块后，AOT编译python/_signals_njit.py中的numba信号内核 (numba不可用时跳过)"""
+
+    def run(self):
+        super().run()
+        # 仅在导入构建脚本期间将python/加入模块搜索路径
+        python_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python")
+        sys.path.insert(0, python_dir)
+        try:
+            from _signals_aot_build import cc
+        except ImportError:
+            print("numba not available, skipping AOT compilation of signal kernels")
+            return
+        finally:
+            sys.path.remove(python_dir)
+        # AOT内核是可选的: 编译失败时不影响C++模块，运行时回退到JIT/NumPy实现
+        try:
+            cc.compile()
+        except Exception as e:
+            print(f"AOT compilation of signal kernels failed ({e}), falling back to JIT at runtime")
+
 setup(
     name="cpp_backtest",
     version="0.1",
@@ -28,7 +63,7 @@ setup(
     description="C++ implementation of backtesting functionality",
     long_description="Bridge between Python and C++ for efficient backtesting",
     ext_modules=ext_modules,
-    cmdclass={"build_ext": build_ext},
+    cmdclass={"build_ext": BuildExtWithAOT},
     zip_safe=False,
     python_requires=">=3.6",
 ) 
\ No newline at end of file
@@ -44,40 +44,26 @@ std::string formatDateTime(const DateTime& dt) {
     return date_str;
 }
 
-// 创建完整的账户详细信息并保存为CSV (基于原始价格数据)
-void create_account_details_with_prices(
+// 计算完整的账户详细信息 (基于原始价格数据)
+std::vector<AccountDetail> compute_account_details(
     const std::vector<Trade>& trades,
     const std::vector<double>& prices,
     const std::vector<DateTime>& dates,
-    double initial_capital,
-    const std::string& output_file
+    double initial_capital
 ) {
     if (trades.empty()) {
         std::cerr << "No trades provided for account details generation" << std::endl;
-        return;
+        return {};
     }
     
     if (prices.empty() || dates.empty() || prices.size() != dates.size()) {
         std::cerr << "Invalid price data or date data for account details generation" << std::endl;
-        return;
+        return {};
     }
     
     std::cout << "Generating complete account details for " << trades.size() 
               << " trades across " << dates.size() << " time points..." << std::endl;
     
-    // 创建账户详细信息数据结构
-    struct AccountDetail {
-        DateTime date;
-        double price;
-        double balance;
-        double position_value;
-        double total_value;
-        double profit_loss;
-        double cumulative_return;
-        double drawdown;
-        int active_trades;
-    };
-    
     // 对于每个交易创建一个交易事件列表
     struct TradeEvent {
         DateTime time;
@@ -116,6 +102,7 @@ void create_account_details_with_prices(
     
     // 创建账户详细信息时间序列
     std::vector<AccountDetail> account_details;
+    account_details.reserve(dates.size());
     
     double balance = initial_capital;
     double max_value = initial_capital;
@@ -186,6 +173,32 @@ void create_account_details_with_prices(
         });
     }
     
+    return account_details;
+}
+
+// 创建完整的账户详细信息并保存为CSV (基于原始价格数据)
+void create_account_details_with_prices(
+    const std::vector<Trade>& trades,
+    const std::vector<double>& prices,
+    const std::vector<DateTime>& dates,
+    double initial_capital,
+    const std::string& output_file
+) {
+    std::vector<AccountDetail> account_details = compute_account_details(trades, prices, dates, initial_capital);
+    if (account_details.empty()) {
+        return;
+    }
+    
+    write_account_details_csv(account_details, trades.size(), initial_capital, output_file);
+}
+
+// 将已计算的账户详细信息保存为CSV (含摘要统计)
+void write_account_details_csv(
+    const std::vector<AccountDetail>& account_details,
+    size_t total_trades,
+    double initial_capital,
+    const std::string& output_file
+) {
     // 生成统计数据
     double final_value = account_details.empty() ? initial_capital : account_details.back().total_value;
     double total_return = (final_value / initial_capital - 1.0) * 100.0;
@@ -225,8 +238,8 @@ void create_account_details_with_prices(
     file << "Final Value," << std::fixed << std::setprecision(2) << final_value << "\n";
     file << "Total Return (%)," << std::fixed << std::setprecision(2) << total_return << "\n";
     file << "Max Drawdown (%)," << std::fixed << std::setprecision(2) << max_drawdown << "\n";
-    file << "Total Trades," << trades.size() << "\n";
-    file << "Total Data Points," << dates.size() << "\n";
+    file << "Total Trades," << total_trades << "\n";
+    file << "Total Data Points," << account_details.size() << "\n";
     
     file.close();
     
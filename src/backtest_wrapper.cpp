@@ -1,11 +1,13 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <pybind11/chrono.h>
+#include <pybind11/numpy.h>
 #include "backtest.h"
 #include <vector>
 #include <map>
 #include <string>
 #include <chrono>
+#include <ctime>
 
 namespace py = pybind11;
 
@@ -22,6 +24,106 @@ DateTime convert_datetime(const py::handle& dt) {
     return std::chrono::system_clock::from_time_t(static_cast<time_t>(ts));
 }
 
+// 将int64纳秒时间戳转换为C++ DateTime
+// 时间戳视为无时区的本地时间 (与pandas无时区索引及pybind11的datetime转换保持一致)
+DateTime convert_ns_to_datetime(int64_t ns) {
+    int64_t secs = ns / 1000000000;
+    int64_t rem = ns % 1000000000;
+    if (rem < 0) {
+        secs -= 1;
+        rem += 1000000000;
+    }
+    std::time_t tt = static_cast<std::time_t>(secs);
+    std::tm cal = *std::gmtime(&tt);
+    cal.tm_isdst = -1;
+    return std::chrono::system_clock::from_time_t(std::mktime(&cal))
+        + std::chrono::duration_cast<DateTime::duration>(std::chrono::microseconds(rem / 1000));
+}
+
+// 将int64纳秒UTC时间戳 (真实时刻) 转换为C++ DateTime，无需经过本地时间换算
+DateTime convert_utc_ns_to_datetime(int64_t ns) {
+    int64_t us = ns / 1000;
+    if (ns % 1000 < 0) {
+        us -= 1;
+    }
+    return DateTime(std::chrono::duration_cast<DateTime::duration>(std::chrono::microseconds(us)));
+}
+
+// 将C++ DateTime转换为int64纳秒时间戳 (convert_ns_to_datetime的逆变换，输出无时区的本地时间)
+int64_t convert_datetime_to_ns(const DateTime& dt) {
+    auto us = std::chrono::duration_cast<std::chrono::microseconds>(dt.time_since_epoch()).count();
+    int64_t secs = us / 1000000;
+    int64_t rem = us % 1000000;
+    if (rem < 0) {
+        secs -= 1;
+        rem += 1000000;
+    }
+    std::time_t tt = static_cast<std::time_t>(secs);
+    std::tm cal = *std::localtime(&tt);
+    
+    // 由年月日计算距1970-01-01的天数 (公历)
+    int64_t y = cal.tm_year + 1900;
+    int64_t m = cal.tm_mon + 1;
+    y -= m <= 2;
+    int64_t era = (y >= 0 ? y : y - 399) / 400;
+    int64_t yoe = y - era * 400;
+    int64_t doy = (153 * (m + (m > 2 ? -3 : 9)) + 2) / 5 + cal.tm_mday - 1;
+    int64_t doe = yoe * 365 + yoe / 4 - yoe / 100 + doy;
+    int64_t days = era * 146097 + doe - 719468;
+    
+    int64_t wall_secs = days * 86400 + cal.tm_hour * 3600 + cal.tm_min * 60 + cal.tm_sec;
+    return wall_secs * 1000000000 + rem * 1000;
+}
+
+// 信号数组类型 (int8, C连续)
+using SignalArray = py::array_t<int8_t, py::array::c_style | py::array::forcecast>;
+// 纳秒时间戳数组类型 (int64, C连续)
+using NsArray = py::array_t<int64_t, py::array::c_style | py::array::forcecast>;
+// 价格数组类型 (float64, C连续)
+using PriceArray = py::array_t<double, py::array::c_style | py::array::forcecast>;
+
+// 回测参数配置 (Python端构造一次，可在多次回测间复用)
+struct BacktestConfig {
+    std::string timeframe = "1d";
+    std::string trade_type = "long";
+    double initial_capital = 10000.0;
+    double position_size_pct = 1.0;
+    double commission_pct = 0.001;
+    double take_profit_pct = 0.0;
+    double stop_loss_pct = 0.0;
+    int min_holding_period = 1;
+    int max_holding_period = 0;
+    double slippage_pct = 0.0;
+    int max_positions = 1;
+    bool force_close_on_signal = true;
+    std::string trades_format = "dicts";
+};
+
+// 将int8信号数组转换为Backtest使用的std::vector<int>
+std::vector<int> signals_to_vector(const SignalArray& signals) {
+    const int8_t* ptr = signals.data();
+    return std::vector<int>(ptr, ptr + signals.size());
+}
+
+// 直接读取int64纳秒时间戳数组的底层缓冲区，转换为日期序列
+// dates_are_utc为true时时间戳为UTC时刻，否则为无时区的本地时间
+std::vector<DateTime> ns_array_to_dates(const NsArray& dates_ns, bool dates_are_utc = false) {
+    const int64_t* ns = dates_ns.data();
+    const py::ssize_t n = dates_ns.size();
+    std::vector<DateTime> dates;
+    dates.reserve(static_cast<size_t>(n));
+    if (dates_are_utc) {
+        for (py::ssize_t i = 0; i < n; ++i) {
+            dates.push_back(convert_utc_ns_to_datetime(ns[i]));
+        }
+    } else {
+        for (py::ssize_t i = 0; i < n; ++i) {
+            dates.push_back(convert_ns_to_datetime(ns[i]));
+        }
+    }
+    return dates;
+}
+
 // 将C++ DateTime转换为Python datetime.datetime
 py::object convert_to_py_datetime(const DateTime& dt) {
     auto time_since_epoch = dt.time_since_epoch();
@@ -84,11 +186,66 @@ py::dict convert_trade_to_dict(const Trade& trade) {
     return result;
 }
 
+// 将交易记录转换为按列存储的Python字典 (每列为一个numpy数组)
+// 时间列为int64纳秒时间戳；字符串列为object数组，相同取值共享同一个Python字符串对象
+py::dict convert_trades_to_columns(const std::vector<Trade>& trades) {
+    const py::ssize_t n = static_cast<py::ssize_t>(trades.size());
+    py::array_t<int64_t> entry_time(n), exit_time(n), hold_bars(n);
+    py::array_t<double> entry_price(n), exit_price(n), quantity(n), profit(n), profit_pct(n);
+    py::list direction, exit_reason;
+    std::map<std::string, py::str> interned;
+    auto intern = [&interned](const std::string& value) {
+        auto it = interned.find(value);
+        if (it == interned.end()) {
+            it = interned.emplace(value, py::str(value)).first;
+        }
+        return it->second;
+    };
+    
+    int64_t* p_entry_time = entry_time.mutable_data();
+    int64_t* p_exit_time = exit_time.mutable_data();
+    int64_t* p_hold_bars = hold_bars.mutable_data();
+    double* p_entry_price = entry_price.mutable_data();
+    double* p_exit_price = exit_price.mutable_data();
+    double* p_quantity = quantity.mutable_data();
+    double* p_profit = profit.mutable_data();
+    double* p_profit_pct = profit_pct.mutable_data();
+    
+    for (py::ssize_t i = 0; i < n; ++i) {
+        const Trade& trade = trades[i];
+        p_entry_time[i] = convert_datetime_to_ns(trade.entryTime);
+        p_exit_time[i] = convert_datetime_to_ns(trade.exitTime);
+        p_hold_bars[i] = trade.exitIndex - trade.entryIndex;
+        p_entry_price[i] = trade.entryPrice;
+        p_exit_price[i] = trade.exitPrice;
+        p_quantity[i] = trade.quantity;
+        p_profit[i] = trade.profit;
+        p_profit_pct[i] = trade.profitPct;
+        direction.append(intern(trade.direction));
+        exit_reason.append(intern(trade.exitReason));
+    }
+    
+    py::module_ np = py::module_::import("numpy");
+    py::dict result;
+    result["entry_time"] = entry_time;
+    result["exit_time"] = exit_time;
+    result["entry_price"] = entry_price;
+    result["exit_price"] = exit_price;
+    result["quantity"] = quantity;
+    result["profit"] = profit;
+    result["profit_pct"] = profit_pct;
+    result["direction"] = np.attr("array")(direction, py::arg("dtype") = "object");
+    result["exit_reason"] = np.attr("array")(exit_reason, py::arg("dtype") = "object");
+    result["hold_bars"] = hold_bars;
+    
+    return result;
+}
+
 // 主回测函数，返回Python字典
 py::dict run_backtest(
     const std::vector<double>& prices,
-    const std::vector<int>& entries,
-    const std::vector<int>& exits,
+    const SignalArray& entries,
+    const SignalArray& exits,
     const std::vector<std::chrono::system_clock::time_point>& dates,
     const std::string& timeframe = "1d",
     const std::string& trade_type = "long",
@@ -101,13 +258,18 @@ py::dict run_backtest(
     int max_holding_period = 0,
     double slippage_pct = 0.0,
     int max_positions = 1,
-    bool force_close_on_signal = true  // 添加新选项：强制在信号出现时平仓
+    bool force_close_on_signal = true,  // 添加新选项：强制在信号出现时平仓
+    const std::string& trades_format = "dicts"  // 交易记录格式: "dicts"（字典列表）或"columnar"（按列的numpy数组）
 ) {
+    if (trades_format != "dicts" && trades_format != "columnar") {
+        throw py::value_error("Unsupported trades_format: " + trades_format);
+    }
+    
     // 创建回测对象
     Backtest backtest(
         prices,
-        entries,
-        exits,
+        signals_to_vector(entries),
+        signals_to_vector(exits),
         dates,
         timeframe,
         trade_type,
@@ -144,15 +306,93 @@ py::dict run_backtest(
     result["metrics"] = convert_metrics_to_dict(metrics);
     
     // 添加交易记录
-    py::list trade_list;
-    for (const auto& trade : trades) {
-        trade_list.append(convert_trade_to_dict(trade));
+    if (trades_format == "columnar") {
+        result["trades"] = convert_trades_to_columns(trades);
+    } else {
+        py::list trade_list;
+        for (const auto& trade : trades) {
+            trade_list.append(convert_trade_to_dict(trade));
+        }
+        result["trades"] = trade_list;
     }
-    result["trades"] = trade_list;
     
     return result;
 }
 
+// 主回测函数 - 日期以int64纳秒时间戳数组传入，避免逐个转换Python datetime对象
+py::dict run_backtest_ns(
+    const std::vector<double>& prices,
+    const SignalArray& entries,
+    const SignalArray& exits,
+    const NsArray& dates_ns,
+    const std::string& timeframe = "1d",
+    const std::string& trade_type = "long",
+    double initial_capital = 10000.0,
+    double position_size_pct = 1.0,
+    double commission_pct = 0.001,
+    double take_profit_pct = 0.0,
+    double stop_loss_pct = 0.0,
+    int min_holding_period = 1,
+    int max_holding_period = 0,
+    double slippage_pct = 0.0,
+    int max_positions = 1,
+    bool force_close_on_signal = true,
+    const std::string& trades_format = "dicts",
+    bool dates_are_utc = false
+) {
+    return run_backtest(
+        prices,
+        entries,
+        exits,
+        ns_array_to_dates(dates_ns, dates_are_utc),
+        timeframe,
+        trade_type,
+        initial_capital,
+        position_size_pct,
+        commission_pct,
+        take_profit_pct,
+        stop_loss_pct,
+        min_holding_period,
+        max_holding_period,
+        slippage_pct,
+        max_positions,
+        force_close_on_signal,
+        trades_format
+    );
+}
+
+// 主回测函数 - 参数以BacktestConfig结构体按位置传入，避免逐个关键字参数的分派开销
+py::dict run_backtest_cfg(
+    const PriceArray& prices,
+    const SignalArray& entries,
+    const SignalArray& exits,
+    const NsArray& dates_ns,
+    const BacktestConfig& config,
+    bool dates_are_utc = false
+) {
+    const double* price_ptr = prices.data();
+    
+    return run_backtest(
+        std::vector<double>(price_ptr, price_ptr + prices.size()),
+        entries,
+        exits,
+        ns_array_to_dates(dates_ns, dates_are_utc),
+        config.timeframe,
+        config.trade_type,
+        config.initial_capital,
+        config.position_size_pct,
+        config.commission_pct,
+        config.take_profit_pct,
+        config.stop_loss_pct,
+        config.min_holding_period,
+        config.max_holding_period,
+        config.slippage_pct,
+        config.max_positions,
+        config.force_close_on_signal,
+        config.trades_format
+    );
+}
+
 // 包装函数 - 运行多策略回测
 py::dict run_multi_backtest(
     const std::vector<double>& prices,
@@ -252,6 +492,80 @@ py::object create_account_details_with_prices_wrapper(
     return py::str(output_file);
 }
 
+// 按列返回完整的账户详细信息 (每列为一个numpy数组，date列为无时区本地时间的int64纳秒时间戳)；指定output_file时同时基于同一结果保存CSV
+py::object get_account_details_wrapper(
+    const int total_trades,
+    double initial_capital = 10000.0,
+    const std::string& output_file = ""
+) {
+    // 检查交易和价格数据是否可用
+    if (total_trades <= 0) {
+        std::cerr << "No trades to process" << std::endl;
+        return py::none();
+    }
+    
+    if (last_backtest_trades.empty() || last_backtest_prices.empty() || last_backtest_dates.empty()) {
+        std::cerr << "No backtest data available" << std::endl;
+        return py::none();
+    }
+    
+    std::vector<AccountDetail> details = compute_account_details(
+        last_backtest_trades,
+        last_backtest_prices,
+        last_backtest_dates,
+        initial_capital
+    );
+    if (details.empty()) {
+        return py::none();
+    }
+    
+    if (!output_file.empty()) {
+        write_account_details_csv(details, last_backtest_trades.size(), initial_capital, output_file);
+    }
+    
+    const py::ssize_t n = static_cast<py::ssize_t>(details.size());
+    py::array_t<int64_t> date(n);
+    py::array_t<double> price(n), balance(n), position_value(n), total_value(n);
+    py::array_t<double> profit_loss(n), cumulative_return(n), drawdown(n);
+    py::array_t<int32_t> active_trades(n);
+    
+    int64_t* p_date = date.mutable_data();
+    double* p_price = price.mutable_data();
+    double* p_balance = balance.mutable_data();
+    double* p_position_value = position_value.mutable_data();
+    double* p_total_value = total_value.mutable_data();
+    double* p_profit_loss = profit_loss.mutable_data();
+    double* p_cumulative_return = cumulative_return.mutable_data();
+    double* p_drawdown = drawdown.mutable_data();
+    int32_t* p_active_trades = active_trades.mutable_data();
+    
+    for (py::ssize_t i = 0; i < n; ++i) {
+        const AccountDetail& detail = details[i];
+        p_date[i] = convert_datetime_to_ns(detail.date);
+        p_price[i] = detail.price;
+        p_balance[i] = detail.balance;
+        p_position_value[i] = detail.position_value;
+        p_total_value[i] = detail.total_value;
+        p_profit_loss[i] = detail.profit_loss;
+        p_cumulative_return[i] = detail.cumulative_return;
+        p_drawdown[i] = detail.drawdown;
+        p_active_trades[i] = detail.active_trades;
+    }
+    
+    py::dict result;
+    result["date"] = date;
+    result["price"] = price;
+    result["balance"] = balance;
+    result["position_value"] = position_value;
+    result["total_value"] = total_value;
+    result["profit_loss"] = profit_loss;
+    result["cumulative_return"] = cumulative_return;
+    result["drawdown"] = drawdown;
+    result["active_trades"] = active_trades;
+    
+    return result;
+}
+
 PYBIND11_MODULE(cpp_backtest, m) {
     m.doc() = "C++ Backtest module";
     
@@ -271,7 +585,102 @@ PYBIND11_MODULE(cpp_backtest, m) {
         py::arg("max_holding_period") = 0,
         py::arg("slippage_pct") = 0.0,
         py::arg("max_positions") = 1,
-        py::arg("force_close_on_signal") = true  // 添加新参数的默认值
+        py::arg("force_close_on_signal") = true,  // 添加新参数的默认值
+        py::arg("trades_format") = "dicts"
+    );
+    
+    // 日期以int64纳秒时间戳数组传入 (单独命名，便于Python端检测扩展模块是否支持)
+    m.def("run_backtest_ns", &run_backtest_ns, "Run backtest with dates given as int64 epoch nanoseconds (naive local wall clock, or UTC instants when dates_are_utc)",
+        py::arg("prices"),
+        py::arg("entries"),
+        py::arg("exits"),
+        py::arg("dates_ns"),
+        py::arg("timeframe") = "1d",
+        py::arg("trade_type") = "long",
+        py::arg("initial_capital") = 10000.0,
+        py::arg("position_size_pct") = 1.0,
+        py::arg("commission_pct") = 0.001,
+        py::arg("take_profit_pct") = 0.0,
+        py::arg("stop_loss_pct") = 0.0,
+        py::arg("min_holding_period") = 1,
+        py::arg("max_holding_period") = 0,
+        py::arg("slippage_pct") = 0.0,
+        py::arg("max_positions") = 1,
+        py::arg("force_close_on_signal") = true,
+        py::arg("trades_format") = "dicts",
+        py::arg("dates_are_utc") = false
+    );
+    
+    // 关键字参数的默认值取自结构体的成员默认值 (唯一来源)
+    const BacktestConfig defaults;
+    py::class_<BacktestConfig>(m, "BacktestConfig", "Backtest parameters, built once and passed positionally to run_backtest_cfg")
+        .def(py::init([](
+                const std::string& timeframe,
+                const std::string& trade_type,
+                double initial_capital,
+                double position_size_pct,
+                double commission_pct,
+                double take_profit_pct,
+                double stop_loss_pct,
+                int min_holding_period,
+                int max_holding_period,
+                double slippage_pct,
+                int max_positions,
+                bool force_close_on_signal,
+                const std::string& trades_format
+            ) {
+                return BacktestConfig{
+                    timeframe,
+                    trade_type,
+                    initial_capital,
+                    position_size_pct,
+                    commission_pct,
+                    take_profit_pct,
+                    stop_loss_pct,
+                    min_holding_period,
+                    max_holding_period,
+                    slippage_pct,
+                    max_positions,
+                    force_close_on_signal,
+                    trades_format
+                };
+            }),
+            py::arg("timeframe") = defaults.timeframe,
+            py::arg("trade_type") = defaults.trade_type,
+            py::arg("initial_capital") = defaults.initial_capital,
+            py::arg("position_size_pct") = defaults.position_size_pct,
+            py::arg("commission_pct") = defaults.commission_pct,
+            py::arg("take_profit_pct") = defaults.take_profit_pct,
+            py::arg("stop_loss_pct") = defaults.stop_loss_pct,
+            py::arg("min_holding_period") = defaults.min_holding_period,
+            py::arg("max_holding_period") = defaults.max_holding_period,
+            py::arg("slippage_pct") = defaults.slippage_pct,
+            py::arg("max_positions") = defaults.max_positions,
+            py::arg("force_close_on_signal") = defaults.force_close_on_signal,
+            py::arg("trades_format") = defaults.trades_format
+        )
+        .def_readonly("timeframe", &BacktestConfig::timeframe)
+        .def_readonly("trade_type", &BacktestConfig::trade_type)
+        .def_readonly("initial_capital", &BacktestConfig::initial_capital)
+        .def_readonly("position_size_pct", &BacktestConfig::position_size_pct)
+        .def_readonly("commission_pct", &BacktestConfig::commission_pct)
+        .def_readonly("take_profit_pct", &BacktestConfig::take_profit_pct)
+        .def_readonly("stop_loss_pct", &BacktestConfig::stop_loss_pct)
+        .def_readonly("min_holding_period", &BacktestConfig::min_holding_period)
+        .def_readonly("max_holding_period", &BacktestConfig::max_holding_period)
+        .def_readonly("slippage_pct", &BacktestConfig::slippage_pct)
+        .def_readonly("max_positions", &BacktestConfig::max_positions)
+        .def_readonly("force_close_on_signal", &BacktestConfig::force_close_on_signal)
+        .def_readonly("trades_format", &BacktestConfig::trades_format);
+    
+    // 参数以BacktestConfig按位置传入
+    m.def("run_backtest_cfg", &run_backtest_cfg, "Run backtest with int64 epoch-ns dates and a prebuilt BacktestConfig",
+        py::arg("prices"),
+        py::arg("entries"),
+        py::arg("exits"),
+        py::arg("dates_ns"),
+        py::arg("config"),
+        py::arg("dates_are_utc") = false
     );
     
     m.def("run_multi_backtest", &run_multi_backtest,
@@ -299,4 +708,11 @@ PYBIND11_MODULE(cpp_backtest, m) {
         py::arg("output_file") = "account_details_full.csv",
         "Generate complete account information for all price data points and save to CSV file"
     );
+    
+    m.def("get_account_details", &get_account_details_wrapper,
+        py::arg("total_trades"),
+        py::arg("initial_capital") = 10000.0,
+        py::arg("output_file") = "",
+        "Return complete account information for all price data points as columnar numpy arrays, optionally also saving it to a CSV file"
+    );
 } 
\ No newline at end of file
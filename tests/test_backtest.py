@@ -0,0 +1,148 @@
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'python')]
+
+pytest.importorskip('cpp_backtest')
+import backtest  # noqa: E402
+from backtest import create_aggregated_record, create_backtest, get_account_details  # noqa: E402
+
+# 2023-11-03 ~ 2023-11-08 (UTC)，跨越美国夏令时结束 (2023-11-05)
+EPOCH_SECONDS = np.array([1699000000 + 86400 * i for i in range(6)], dtype=np.int64)
+ENTRIES = np.array([0, 1, 0, 0, 0, 0], dtype=np.int8)
+EXITS = np.array([0, 0, 0, -1, 0, 0], dtype=np.int8)
+
+
+@pytest.fixture(params=['Asia/Tokyo', 'America/New_York'])
+def local_tz(request, monkeypatch):
+    monkeypatch.setenv('TZ', request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _run(index, trades_format='dicts'):
+    data = pd.DataFrame({'close': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]}, index=index)
+    return create_backtest(ENTRIES, EXITS, data, trades_format=trades_format)['trades']
+
+
+@pytest.mark.parametrize('index', [
+    EPOCH_SECONDS,
+    EPOCH_SECONDS * 1000,
+    EPOCH_SECONDS * 1000.0 + 0.5,
+], ids=['seconds', 'milliseconds', 'float-milliseconds'])
+def test_numeric_index_matches_fromtimestamp(local_tz, index):
+    # 旧实现使用datetime.fromtimestamp，即该时刻在本机时区的本地时间
+    expected = [datetime.fromtimestamp(ts).replace(microsecond=0) for ts in EPOCH_SECONDS]
+    trades = _run(index)
+    assert len(trades) == 1
+    assert trades[0]['entry_time'].replace(microsecond=0) == expected[1]
+    assert trades[0]['exit_time'].replace(microsecond=0) == expected[3]
+
+
+def test_tz_aware_index_matches_numeric_index(local_tz):
+    # 带时区的索引表示真实时刻，与数值时间戳一致 (与本机时区不同时也是如此)
+    aware_index = pd.to_datetime(EPOCH_SECONDS, unit='s', utc=True).tz_convert('Europe/London')
+    from_numeric = _run(EPOCH_SECONDS)
+    from_aware = _run(aware_index)
+    assert from_aware[0]['entry_time'] == from_numeric[0]['entry_time']
+    assert from_aware[0]['exit_time'] == from_numeric[0]['exit_time']
+
+
+def test_datetime_index_matches_numeric_index(local_tz):
+    local_index = pd.DatetimeIndex([datetime.fromtimestamp(ts) for ts in EPOCH_SECONDS])
+    from_numeric = _run(EPOCH_SECONDS)
+    from_datetime = _run(local_index)
+    assert from_datetime[0]['entry_time'] == from_numeric[0]['entry_time']
+    assert from_datetime[0]['exit_time'] == from_numeric[0]['exit_time']
+
+
+def test_columnar_trade_times_match_dicts(local_tz):
+    dicts = _run(EPOCH_SECONDS)
+    columns = _run(EPOCH_SECONDS, trades_format='columnar')
+    assert pd.Timestamp(columns['entry_time'][0]).to_pydatetime() == dicts[0]['entry_time']
+    assert pd.Timestamp(columns['exit_time'][0]).to_pydatetime() == dicts[0]['exit_time']
+
+
+def test_config_matches_keyword_arguments():
+    from backtest import BacktestConfig
+    if BacktestConfig is None:
+        pytest.skip('extension built without BacktestConfig')
+    data = pd.DataFrame({'close': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]}, index=EPOCH_SECONDS)
+    kwargs = dict(commission=0.002, take_profit=0.5, trade_type='LONG')
+    config = BacktestConfig(commission_pct=0.002, take_profit_pct=0.5, trade_type='LONG')
+    assert config.initial_capital == 10000.0 and config.min_holding_period == 1
+    expected = create_backtest(ENTRIES, EXITS, data, **kwargs)
+    actual = create_backtest(ENTRIES, EXITS, data, config=config)
+    assert actual['metrics'] == expected['metrics']
+    assert actual['trades'] == expected['trades']
+
+
+def test_signal_conversion_uses_scratch_only_when_copying():
+    seen = {}
+
+    def convert():
+        # 新线程中的线程本地缓冲区初始为空
+        seen['int8'] = backtest._as_int8_signals(ENTRIES, 'entry')
+        seen['bool'] = backtest._as_int8_signals(ENTRIES.astype(bool), 'entry')
+        seen['allocated'] = hasattr(backtest._SCRATCH, 'entry')
+        seen['int64'] = backtest._as_int8_signals(pd.Series(EXITS.astype(np.int64)), 'exit')
+        seen['exit_buffer'] = getattr(backtest._SCRATCH, 'exit', None)
+
+    worker = threading.Thread(target=convert)
+    worker.start()
+    worker.join()
+    assert seen['int8'] is ENTRIES
+    np.testing.assert_array_equal(seen['bool'], ENTRIES)
+    assert not seen['allocated']
+    assert seen['int64'] is seen['exit_buffer']
+    np.testing.assert_array_equal(seen['int64'], EXITS)
+
+
+@pytest.fixture
+def backtested_frame():
+    index = pd.date_range('2023-01-01', periods=6, freq='D', name='date')
+    df = pd.DataFrame({'close': [10.0, 11.0, 12.5, 12.0, 13.0, 14.0]}, index=index)
+    results = create_backtest(ENTRIES, EXITS, df)
+    return df, results
+
+
+def _record(df, results, **kwargs):
+    path = create_aggregated_record(df, ENTRIES[:len(df)], EXITS[:len(df)], results, **kwargs)
+    try:
+        # 只读取数据部分，跳过末尾的指标摘要
+        return pd.read_csv(path, index_col=0, parse_dates=True, nrows=len(df))
+    finally:
+        os.remove(path)
+
+
+def test_account_details_in_memory_matches_csv(backtested_frame, tmp_path):
+    df, results = backtested_frame
+    account_file = str(tmp_path / 'account_details.csv')
+    details = get_account_details(results['metrics']['total_trades'], output_file=account_file)
+    np.testing.assert_array_equal(details['date'].view('datetime64[ns]'), df.index.values)
+
+    from_memory = _record(df, results, account_details=details)
+    from_file = _record(df, results, account_details_file=account_file)
+    assert list(from_memory.columns) == list(from_file.columns)
+    pd.testing.assert_index_equal(from_memory.index, from_file.index)
+    # CSV中的数值保留两位小数
+    pd.testing.assert_frame_equal(from_memory, from_file, check_dtype=False, atol=0.006)
+
+
+def test_account_details_align_by_date(backtested_frame):
+    df, results = backtested_frame
+    details = get_account_details(results['metrics']['total_trades'])
+    # 顺序不同且行数不同的数据仍按日期对齐
+    subset = df.iloc[::-2]
+    record = _record(subset, results, account_details=details)
+    np.testing.assert_array_equal(record['account_price'].to_numpy(), subset['close'].to_numpy())
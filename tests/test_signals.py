@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'python')]
+
+# main导入backtest，后者需要已编译的C++扩展模块
+pytest.importorskip('cpp_backtest')
+import _signals_njit  # noqa: E402
+import main  # noqa: E402
+
+TRADE_TYPES = ['long', 'short', 'long_short']
+SIGNAL_TYPES = ['trend', 'cross']
+
+
+def _states(n, seed):
+    rng = np.random.default_rng(seed)
+    # 入场/出场状态互斥 (long_short模式的前提)
+    state = rng.integers(-1, 2, size=n)
+    return pd.Series((state == 1).astype(int)), pd.Series((state == -1).astype(int))
+
+
+@pytest.mark.parametrize('trade_type', TRADE_TYPES)
+@pytest.mark.parametrize('signal_type', SIGNAL_TYPES)
+@pytest.mark.parametrize('n', [1, 2, 257])
+def test_compiled_kernels_match_numpy(monkeypatch, trade_type, signal_type, n):
+    entry_state, exit_state = _states(n, seed=n)
+    df = pd.DataFrame({'close': np.arange(n, dtype=float)})
+
+    monkeypatch.setattr(main, 'HAS_COMPILED_KERNELS', True)
+    kernel_entry, kernel_exit = main.generate_signals(df, entry_state, exit_state, trade_type, signal_type)
+    monkeypatch.setattr(main, 'HAS_COMPILED_KERNELS', False)
+    numpy_entry, numpy_exit = main.generate_signals(df, entry_state, exit_state, trade_type, signal_type)
+
+    assert kernel_entry.dtype == numpy_entry.dtype == np.int8
+    np.testing.assert_array_equal(kernel_entry, numpy_entry)
+    np.testing.assert_array_equal(kernel_exit, numpy_exit)
+
+
+def test_long_trend_signals():
+    entry_state = pd.Series([0, 1, 1, 0, 0])
+    exit_state = pd.Series([0, 0, 0, 1, 0])
+    df = pd.DataFrame({'close': np.ones(5)})
+    entry, exit_ = main.generate_signals(df, entry_state, exit_state, 'long', 'trend')
+    np.testing.assert_array_equal(entry, [0, 1, 1, 0, 0])
+    np.testing.assert_array_equal(exit_, [0, 0, 0, -1, 0])
+
+
+@pytest.mark.parametrize('compiled', [True, False], ids=['kernel', 'cumsum'])
+@pytest.mark.parametrize('n, window', [(1, 3), (3, 3), (200, 10), (50, 1)])
+def test_sma_matches_rolling_mean(monkeypatch, compiled, n, window):
+    monkeypatch.setattr(_signals_njit, 'HAS_COMPILED_KERNELS', compiled)
+    close = pd.Series(np.random.default_rng(window).normal(100.0, 5.0, size=n))
+    expected = close.rolling(window).mean().to_numpy()
+    np.testing.assert_allclose(_signals_njit.sma(close, window), expected, rtol=1e-10, equal_nan=True)